@@ -0,0 +1,69 @@
+"""RLP encoding of signed legacy transactions for the Trezor scripts.
+
+The field layout is fixed, so each field is encoded directly by its known
+kind instead of through a generic sedes dispatch. The six unsigned fields
+are encoded once and reused for both the EIP-155 signing preimage and the
+final signed transaction.
+"""
+
+
+def _length_of_length(payload_length):
+    return (payload_length.bit_length() + 7) // 8
+
+
+def _encode_int(value):
+    if 0 < value < 0x80:
+        return bytes((value,))
+    return _encode_bytes(value.to_bytes((value.bit_length() + 7) // 8, 'big'))
+
+
+def _encode_bytes(value):
+    n = len(value)
+    if n == 1 and value[0] < 0x80:
+        return bytes(value)
+    if n < 56:
+        return bytes((0x80 + n,)) + value
+    return _long_header(n, 0x80) + value
+
+
+def _long_header(payload_length, short_prefix):
+    n = _length_of_length(payload_length)
+    return bytes((short_prefix + 55 + n,)) + payload_length.to_bytes(n, 'big')
+
+
+def _wrap_list(payload):
+    if len(payload) < 56:
+        return bytes((0xc0 + len(payload),)) + payload
+    return _long_header(len(payload), 0xc0) + payload
+
+
+def encode_unsigned_fields(nonce, gas_price, gas_limit, to, value, data):
+    # the six leading fields of a legacy (pre EIP-2718) transaction, without
+    # the list header; to is always a 20 byte address so its header is 0x94
+    assert len(to) == 20, f"to must be a 20 byte address, got {len(to)} bytes"
+    return b"".join((
+        _encode_int(nonce),
+        _encode_int(gas_price),
+        _encode_int(gas_limit),
+        b"\x94" + to,
+        _encode_int(value),
+        _encode_bytes(data),
+    ))
+
+
+def encode_eip155_preimage(unsigned_fields, chain_id):
+    # what the signer hashes: the unsigned fields followed by (chain_id, 0, 0)
+    return _wrap_list(unsigned_fields + _encode_int(chain_id) + b"\x80\x80")
+
+
+def encode_signed_tx(unsigned_fields, v, r, s):
+    # reuses the already encoded unsigned fields, only v, r, s are encoded here;
+    # the device returns r and s as fixed 32 byte strings but RLP wants them
+    # as minimal integers, so any leading zero bytes are dropped
+    return _wrap_list(
+        unsigned_fields
+        + _encode_int(v)
+        + _encode_int(int.from_bytes(r, 'big'))
+        + _encode_int(int.from_bytes(s, 'big'))
+    )
+
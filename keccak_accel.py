@@ -0,0 +1,36 @@
+"""Select the Keccak-256 backend used by eth-hash (and so by web3).
+
+Import this before web3: eth-hash picks its backend once, on first use, so
+setting ETH_HASH_BACKEND here also applies to address checksumming, ABI
+selectors and transaction hashing done inside web3.
+"""
+import logging
+import os
+
+from eth_hash.utils import load_backend
+
+logger = logging.getLogger(__name__)
+
+# both are C implementations, pysha3 (XKCP) first, then pycryptodome; pysha3
+# does not build on Python >= 3.11, where this matches eth-hash's own default
+PREFERRED_BACKENDS = ("pysha3", "pycryptodome")
+
+
+def choose_backend():
+    if os.environ.get("ETH_HASH_BACKEND"):
+        return os.environ["ETH_HASH_BACKEND"]
+    for name in PREFERRED_BACKENDS:
+        try:
+            load_backend(name)
+        except (ImportError, ValueError):
+            continue
+        return name
+    return None
+
+
+BACKEND = choose_backend()
+if BACKEND:
+    os.environ["ETH_HASH_BACKEND"] = BACKEND
+logger.info("eth-hash keccak backend: %s", BACKEND or "auto")
+
+from eth_hash.auto import keccak  # noqa: E402
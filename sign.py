@@ -1,5 +1,10 @@
 import os 
+import json
+import pathlib
 
+import keccak_accel  # noqa: F401, must precede web3
+import requests
+from hexbytes import HexBytes
 from web3 import Web3
 import ledgereth
 from ledgereth.web3 import LedgerSignerMiddleware
@@ -7,9 +12,63 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+ABI = json.loads(pathlib.Path('abi.json').read_text())
+
+# one keep-alive connection shared by web3 and batch_request
+SESSION = requests.Session()
+
+# https://github.com/mds1/multicall, deployed at the same address on most chains
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [{"inputs":[{"components":[{"name":"target","type":"address"},{"name":"allowFailure","type":"bool"},{"name":"callData","type":"bytes"}],"name":"calls","type":"tuple[]"}],"name":"aggregate3","outputs":[{"components":[{"name":"success","type":"bool"},{"name":"returnData","type":"bytes"}],"name":"returnData","type":"tuple[]"}],"stateMutability":"payable","type":"function"}]
+
+
+def batch_request(w3, calls):
+    # send several JSON-RPC calls in a single HTTP POST, results in call order
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = SESSION.post(w3.provider.endpoint_uri, json=payload, timeout=10)
+    response.raise_for_status()
+    body = response.json()
+    # providers that reject or limit batches answer with a single error object
+    if not isinstance(body, list):
+        raise ValueError(body.get("error", body) if isinstance(body, dict) else body)
+    results = {r.get("id"): r for r in body}
+    missing = [i for i in range(len(calls)) if i not in results]
+    if missing:
+        raise ValueError(f"batch response missing ids {missing}")
+    for r in results.values():
+        if "error" in r:
+            raise ValueError(r["error"])
+    return [results[i]["result"] for i in range(len(calls))]
+
+
+def multicall_request(multicall, calls):
+    # build an eth_call to Multicall3.aggregate3 for (contract, fn_name, args) calls
+    data = multicall.encodeABI("aggregate3", [[
+        (contract.address, False, HexBytes(contract.encodeABI(fn_name, args)))
+        for contract, fn_name, args in calls
+    ]])
+    return ("eth_call", [{"to": MULTICALL3_ADDRESS, "data": data}, "latest"])
+
+
+def decode_multicall(w3, result, output_types):
+    # an empty result means there is no Multicall3 contract on this chain
+    if not HexBytes(result):
+        return None
+    # return data is an ABI tuple wrapping the array, so decode it as one
+    results = w3.codec.decode_abi(['(bool,bytes)[]'], HexBytes(result))[0]
+    return [
+        w3.codec.decode_single(output_type, return_data)
+        for (_, return_data), output_type in zip(results, output_types)
+    ]
+
+
 def run():
-    w3 = Web3(Web3.HTTPProvider(os.environ['HTTP_RPC_URL']))
+    w3 = Web3(Web3.HTTPProvider(os.environ['HTTP_RPC_URL'], session=SESSION))
     w3.middleware_onion.add(LedgerSignerMiddleware)
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
 
     accounts = ledgereth.accounts.get_accounts(count=5)
     print("Ledger accounts: ")
@@ -21,19 +80,44 @@ def run():
 
     multisig = w3.eth.contract(
         address=input("multisig address: "),
-        abi=open('abi.json').read()
+        abi=ABI
     )
 
-    if not multisig.functions.isOwner(w3.eth.default_account).call():
+    reads = [
+        (multisig, "isOwner", [w3.eth.default_account]),
+        (multisig, "required", []),
+        (multisig, "transactionCount", []),
+    ]
+    state, chain_id, nonce = batch_request(w3, [
+        multicall_request(multicall, reads),
+        ("eth_chainId", []),
+        ("eth_getTransactionCount", [w3.eth.default_account, "pending"]),
+    ])
+    values = decode_multicall(w3, state, ['bool', 'uint256', 'uint256'])
+    if values is None:
+        print(f"Multicall3 not deployed at {MULTICALL3_ADDRESS}, reading multisig state one call at a time")
+        values = [
+            getattr(contract.functions, fn_name)(*args).call()
+            for contract, fn_name, args in reads
+        ]
+    is_owner, required, transaction_count = values
+
+    if not is_owner:
         print(f"Ledger addres is not an owner {w3.eth.default_account}")
         return
 
+    print(f"multisig requires {required} confirmations, {transaction_count} transactions submitted")
 
     txn_id = int(input("txn id you want to confirm: "))
+    if txn_id >= transaction_count:
+        print(f"txn id {txn_id} does not exist")
+        return
     gas_price = w3.toWei(int(input("enter gas price: ")), 'gwei')
     txn = multisig.functions.confirmTransaction(txn_id).build_transaction({
         'gas': 200000,
-        'gasPrice': gas_price
+        'gasPrice': gas_price,
+        'chainId': int(chain_id, 16),
+        'nonce': int(nonce, 16),
     })
     
     print("\n", txn, "\n")
@@ -0,0 +1,76 @@
+import pytest
+
+from fastrlp import encode_eip155_preimage, encode_signed_tx, encode_unsigned_fields
+
+rlp = pytest.importorskip("rlp")
+
+TO = bytes(range(20))
+R = bytes.fromhex("9c" * 32)
+S = bytes.fromhex("01" + "5a" * 31)
+
+
+def signed(nonce, gas_price, gas_limit, to, value, data, v, r, s):
+    return encode_signed_tx(encode_unsigned_fields(nonce, gas_price, gas_limit, to, value, data), v, r, s)
+
+
+def reference(fields):
+    # r and s are RLP integers, so the reference encodes them as ints
+    *head, r, s = fields
+    return rlp.encode(tuple(head) + (int.from_bytes(r, "big"), int.from_bytes(s, "big")))
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 255, 256, 2**64, 8033 * 10**18])
+def test_int_fields(value):
+    fields = (value, value, value, TO, value, b"", 37, R, S)
+    assert signed(*fields) == reference(fields)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"\x00",
+    b"\x7f",
+    b"\x80",
+    b"\xff",
+    b"\x01" * 55,
+    b"\x01" * 56,
+    # confirmTransaction(106)
+    b"\xc0\x1a\x8c\x84" + (106).to_bytes(32, "big"),
+    bytes(range(256)) * 40,
+])
+def test_data_field(data):
+    fields = (5, 10**9, 200000, TO, 0, data, 38, R, S)
+    assert signed(*fields) == reference(fields)
+
+
+@pytest.mark.parametrize("r, s", [
+    (b"\x01", S),
+    (b"\x7f" * 31, S),
+    (R, S),
+    # the device returns 32 byte r/s, which may start with zero bytes
+    (b"\x00" + R[1:], S),
+    (R, b"\x00\x00" + S[2:]),
+    (b"\x00" * 31 + b"\x05", b"\x00" * 31 + b"\x80"),
+])
+def test_signature_values(r, s):
+    fields = (0, 10**9, 200000, TO, 0, b"", 20037, r, s)
+    assert signed(*fields) == reference(fields)
+
+
+def test_leading_zero_r_decodes_as_minimal_int():
+    r = b"\x00" + R[1:]
+    tx = rlp.decode(signed(0, 10**9, 200000, TO, 0, b"", 37, r, S))
+    assert tx[7] == r.lstrip(b"\x00")
+    assert rlp.sedes.big_endian_int.deserialize(tx[7]) == int.from_bytes(r, "big")
+
+
+@pytest.mark.parametrize("chain_id", [1, 127, 128, 10001, 2**40])
+@pytest.mark.parametrize("data", [b"", b"\x01" * 56, bytes(range(256)) * 4])
+def test_eip155_preimage(chain_id, data):
+    unsigned = (7, 20 * 10**9, 200000, TO, 0, data)
+    preimage = encode_eip155_preimage(encode_unsigned_fields(*unsigned), chain_id)
+    assert preimage == rlp.encode(unsigned + (chain_id, 0, 0))
+
+
+def test_to_must_be_20_bytes():
+    with pytest.raises(AssertionError):
+        encode_unsigned_fields(0, 1, 21000, TO[:19], 0, b"")
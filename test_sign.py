@@ -0,0 +1,77 @@
+import json
+from unittest import mock
+
+import pytest
+
+pytest.importorskip("web3")
+pytest.importorskip("ledgereth")
+
+from web3 import Web3  # noqa: E402
+
+import sign  # noqa: E402
+
+
+@pytest.fixture
+def w3():
+    return Web3(Web3.HTTPProvider("http://localhost:8545"))
+
+
+def aggregate3_result(w3, values):
+    return_data = [(True, w3.codec.encode_single(t, v)) for t, v in values]
+    return "0x" + w3.codec.encode_abi(['(bool,bytes)[]'], [return_data]).hex()
+
+
+def test_decode_multicall(w3):
+    result = aggregate3_result(w3, [('bool', True), ('uint256', 2), ('uint256', 107)])
+    assert sign.decode_multicall(w3, result, ['bool', 'uint256', 'uint256']) == [True, 2, 107]
+
+
+def test_decode_multicall_not_deployed(w3):
+    assert sign.decode_multicall(w3, "0x", ['bool']) is None
+
+
+def test_multicall_request_roundtrip(w3):
+    multicall = w3.eth.contract(address=sign.MULTICALL3_ADDRESS, abi=sign.MULTICALL3_ABI)
+    multisig = w3.eth.contract(address="0x16A0772b17AE004E6645E0e95BF50aD69498a34e", abi=sign.ABI)
+    method, (call, block) = sign.multicall_request(multicall, [(multisig, "required", [])])
+    assert method == "eth_call" and block == "latest"
+    assert call["to"] == sign.MULTICALL3_ADDRESS
+    fn, args = multicall.decode_function_input(call["data"])
+    assert fn.fn_name == "aggregate3"
+    assert args["calls"][0][0] == multisig.address
+    assert args["calls"][0][2] == bytes.fromhex(multisig.encodeABI("required", [])[2:])
+
+
+def post_returning(body):
+    response = mock.Mock()
+    response.json.return_value = body
+    return mock.patch.object(sign.SESSION, "post", return_value=response)
+
+
+def test_batch_request_orders_results_by_id(w3):
+    with post_returning([
+        {"jsonrpc": "2.0", "id": 1, "result": "0x1"},
+        {"jsonrpc": "2.0", "id": 0, "result": "0x0"},
+    ]) as post:
+        assert sign.batch_request(w3, [("eth_chainId", []), ("eth_blockNumber", [])]) == ["0x0", "0x1"]
+    payload = post.call_args.kwargs["json"]
+    assert [(p["id"], p["method"]) for p in payload] == [(0, "eth_chainId"), (1, "eth_blockNumber")]
+
+
+def test_batch_request_rejected_batch(w3):
+    error = {"code": -32600, "message": "batch requests not supported"}
+    with post_returning({"jsonrpc": "2.0", "id": None, "error": error}):
+        with pytest.raises(ValueError, match="batch requests not supported"):
+            sign.batch_request(w3, [("eth_chainId", [])])
+
+
+def test_batch_request_missing_id(w3):
+    with post_returning([{"jsonrpc": "2.0", "id": 0, "result": "0x0"}]):
+        with pytest.raises(ValueError, match=r"missing ids \[1\]"):
+            sign.batch_request(w3, [("eth_chainId", []), ("eth_blockNumber", [])])
+
+
+def test_batch_request_call_error(w3):
+    with post_returning([{"jsonrpc": "2.0", "id": 0, "error": {"code": -32000, "message": "execution reverted"}}]):
+        with pytest.raises(ValueError, match="execution reverted"):
+            sign.batch_request(w3, [("eth_call", [{}, "latest"])])
@@ -0,0 +1,64 @@
+"""Trezor account address lookup, cached on disk per device.
+
+Reading the address is a USB round-trip to the device, and the address for
+a given path never changes, so it is stored in ~/.cache/sign_trezor/addr.json
+keyed by device id and derivation path. Devices with passphrase protection
+are never cached: each passphrase opens a different wallet on the same path.
+"""
+import json
+import os
+import pathlib
+import tempfile
+
+from trezorlib import ethereum
+from trezorlib.tools import HARDENED_FLAG
+
+# m/44'/60'/0'/0/0
+ADDRESS_N = (44 | HARDENED_FLAG, 60 | HARDENED_FLAG, 0 | HARDENED_FLAG, 0, 0)
+
+CACHE_FILE = pathlib.Path.home() / ".cache" / "sign_trezor" / "addr.json"
+
+
+def _load_cache():
+    try:
+        return json.loads(CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache):
+    # write a temp file next to the cache and rename it over, so a crash
+    # never leaves a half written cache behind
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_FILE.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, CACHE_FILE)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _cache_key(client, address_n):
+    return f"{client.features.device_id}:{'/'.join(map(str, address_n))}"
+
+
+def get_address(client, address_n=ADDRESS_N):
+    if client.features.passphrase_protection:
+        return ethereum.get_address(client, address_n)
+    key = _cache_key(client, address_n)
+    cache = _load_cache()
+    if key not in cache:
+        cache[key] = ethereum.get_address(client, address_n)
+        _save_cache(cache)
+    return cache[key]
+
+
+def forget_address(client, address_n=ADDRESS_N):
+    # returns whether a cached address was removed
+    cache = _load_cache()
+    if cache.pop(_cache_key(client, address_n), None) is None:
+        return False
+    _save_cache(cache)
+    return True
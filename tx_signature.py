@@ -0,0 +1,21 @@
+"""Check a hardware wallet signature before the transaction leaves the host.
+
+Recovers the sender of a signed EIP-155 legacy transaction with eth_keys
+(libsecp256k1 through coincurve when installed), the off-chain counterpart
+of the ecrecover precompile.
+"""
+from eth_keys import keys
+
+from fastrlp import encode_eip155_preimage
+from keccak_accel import keccak
+
+
+def recover_sender(unsigned_fields, chain_id, v, r, s):
+    # unsigned_fields as returned by fastrlp.encode_unsigned_fields
+    msg_hash = keccak(encode_eip155_preimage(unsigned_fields, chain_id))
+    signature = keys.Signature(vrs=(
+        v - 35 - 2 * chain_id,
+        int.from_bytes(r, 'big'),
+        int.from_bytes(s, 'big'),
+    ))
+    return signature.recover_public_key_from_msg_hash(msg_hash).to_checksum_address()